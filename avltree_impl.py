@@ -1,4 +1,14 @@
+import hashlib
+import heapq
+import mmap
+import operator
+import os
+import pickle
 import random
+import struct
+import threading
+import zlib
+from multiprocessing import resource_tracker, shared_memory
 
 
 class AVLNode(object):
@@ -268,19 +278,342 @@ class AVLNode(object):
         self.fix_node_height_and_size()
 
 
+class HashedAVLNode(AVLNode):
+    """
+    A class representing a node in an AVL tree which also keeps a content hash of its subtree.
+
+    The hash of a subtree is a polynomial hash of the sequence of its values, so it depends only on the items and
+    their order, not on the shape of the tree, and is combined from the hashes of the children like the size.
+    Values must be None, str, bytes, int or float, the types whose equal values have one canonical encoding.
+    """
+    MODULUS = (1 << 61) - 1
+    BASE = 0x9E3779B97F4A7C15 % MODULUS
+
+    def __init__(self, value, is_real=True):
+        """
+        Constructor
+
+        @type value: str or None
+        @param value: data of your node
+        @type is_real: bool
+        @param is_real: False if the node is virtual, True otherwise
+        @raises TypeError: if self is real and value has a type which cannot be hashed
+        """
+        value_hash = HashedAVLNode.hash_value(value) if is_real else 0
+        AVLNode.__init__(self, value, is_real)
+        self.value_hash = value_hash
+        self.hash = self.value_hash
+        self.power = HashedAVLNode.BASE if is_real else 1
+
+    @staticmethod
+    def hash_value(value):
+        """
+        returns the hash of a single value, which is stable across processes and equal for equal values
+
+        @type value: str or None
+        @param value: a value of type None, str, bytes, int (or bool) or float
+        @rtype: int
+        @returns: the hash of value, modulo MODULUS
+        @raises TypeError: if value has another type, whose equal values may have different encodings
+        """
+        digest = hashlib.blake2b(HashedAVLNode.encode_value(value), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') % HashedAVLNode.MODULUS
+
+    @staticmethod
+    def encode_value(value):
+        """
+        returns the canonical encoding of a value, tagged by its kind so that values which are not equal never share
+        an encoding
+
+        @type value: str or None
+        @param value: a value of type None, str, bytes, int (or bool) or float
+        @rtype: bytes
+        @returns: the encoding of value, a float with an integral value is encoded like the equal int
+        @raises TypeError: if value has another type
+        """
+        if value is None:
+            return b'n'
+        if isinstance(value, str):
+            return b's' + value.encode('utf-8', 'surrogatepass')
+        if isinstance(value, bytes):
+            return b'b' + value
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if isinstance(value, int):
+            value = int(value)
+            return b'i' + value.to_bytes(value.bit_length() // 8 + 1, 'little', signed=True)
+        if isinstance(value, float):
+            return b'f' + value.hex().encode('ascii')
+        raise TypeError("cannot hash a value of type %s" % type(value).__name__)
+
+    @staticmethod
+    def hash_of(node):
+        """
+        returns the hash of the subtree rooted with node
+
+        @type node: HashedAVLNode
+        @param node: a node, possibly virtual
+        @rtype: int
+        @returns: the hash of the values in the subtree, 0 for a virtual node
+        """
+        return node.hash if node.isRealNode() else 0
+
+    @staticmethod
+    def power_of(node):
+        """
+        returns BASE to the power of the size of the subtree rooted with node
+
+        @type node: HashedAVLNode
+        @param node: a node, possibly virtual
+        @rtype: int
+        @returns: BASE ** node.getSize() modulo MODULUS
+        """
+        return node.power if node.isRealNode() else 1
+
+    @staticmethod
+    def combine(left_hash, right_hash, right_power):
+        """
+        returns the hash of a sequence made of two sequences
+
+        @type left_hash: int
+        @param left_hash: the hash of the first sequence
+        @type right_hash: int
+        @param right_hash: the hash of the second sequence
+        @type right_power: int
+        @param right_power: BASE to the power of the length of the second sequence
+        @rtype: int
+        @returns: the hash of the concatenated sequence
+        """
+        return (left_hash * right_power + right_hash) % HashedAVLNode.MODULUS
+
+    def setValue(self, value):
+        """
+        sets value, the hashes of self and its ancestors have to be fixed afterwards
+
+        @type value: str or None
+        @param value: data
+        @raises TypeError: if value has a type which cannot be hashed, self is not changed then
+        """
+        value_hash = HashedAVLNode.hash_value(value)
+        AVLNode.setValue(self, value)
+        self.value_hash = value_hash
+
+    def fix_node_height_and_size(self):
+        """
+        sets height, size and hash of self according to its children
+
+        @pre: self.isRealNode() is True
+        """
+        AVLNode.fix_node_height_and_size(self)
+        left, right = self.getLeft(), self.getRight()
+        node_hash = HashedAVLNode.combine(HashedAVLNode.hash_of(left), self.value_hash, HashedAVLNode.BASE)
+        self.hash = HashedAVLNode.combine(node_hash, HashedAVLNode.hash_of(right), HashedAVLNode.power_of(right))
+        self.power = HashedAVLNode.power_of(left) * HashedAVLNode.BASE * HashedAVLNode.power_of(right) \
+            % HashedAVLNode.MODULUS
+
+
+class AVLHandle(object):
+    """
+    A class representing a stable reference to an item of an AVLTreeList, which keeps referring to the same item
+    while other items are inserted and deleted
+    """
+
+    def __init__(self, node):
+        """
+        Constructor
+
+        @type node: AVLNode
+        @param node: the node of the item
+        """
+        self.node = node
+
+    def getNode(self):
+        """
+        returns the node of the item
+
+        @rtype: AVLNode
+        @returns: the node of the item
+        """
+        return self.node
+
+    def getValue(self):
+        """
+        returns the value of the item
+
+        @rtype: str
+        @returns: the value of the item
+        """
+        return self.node.getValue()
+
+
+class AVLBalancingPolicy(object):
+    """
+    A class implementing the default balancing policy of an AVLTreeList, which keeps the tree an AVL tree
+    """
+
+    def rebalance(self, tree, starting_node, fix_to_the_root):
+        """
+        Re-balancing the tree after insertion/deletion
+
+        @type tree: AVLTreeList
+        @param tree: the list to re-balance
+        @type starting_node: AVLNode
+        @param starting_node: The node to be inserted or physically deleted
+        @type fix_to_the_root: bool
+        @param fix_to_the_root: False if re-balancing after insertion, True if re-balancing after deletion
+        @rtype: int
+        @returns: the number of re-balancing operation due to AVL re-balancing
+        """
+        rotations_count = 0
+        y = starting_node.getParent()
+        while y is not None:
+            y_old_height = y.getHeight()
+            y.setHeight(y.calc_height())
+            balance_factor = y.getBalanceFactor()
+            if abs(balance_factor) < 2 and y.getHeight() == y_old_height:
+                break
+            elif abs(balance_factor) < 2 and y.getHeight() != y_old_height:
+                y = y.getParent()
+                continue
+            y_parent = y.getParent()
+            rotations_count += tree.perform_rotation(y)
+            if fix_to_the_root is False:
+                break
+            y = y_parent
+        tree.fix_tree_nodes_height_and_sizes(starting_node)
+        return rotations_count
+
+    def access(self, tree, node):
+        """
+        called whenever node is retrieved by index, AVL trees do not adjust to accesses
+
+        @type tree: AVLTreeList
+        @param tree: the list node belongs to
+        @type node: AVLNode
+        @param node: the retrieved node
+        @rtype: int
+        @returns: the number of rotations performed
+        """
+        return 0
+
+
+class SplayBalancingPolicy(AVLBalancingPolicy):
+    """
+    A class implementing a self-adjusting balancing policy for an AVLTreeList: instead of keeping the tree an AVL
+    tree, every inserted, deleted or retrieved node is splayed to the root, so recently accessed indices are found
+    close to the root. Heights are kept exact but are no longer logarithmic in the worst case.
+    """
+
+    def rebalance(self, tree, starting_node, fix_to_the_root):
+        """
+        fixes sizes and heights after insertion/deletion and splays the affected node to the root
+
+        @type tree: AVLTreeList
+        @param tree: the list to re-balance
+        @type starting_node: AVLNode
+        @param starting_node: The node to be inserted or physically deleted
+        @type fix_to_the_root: bool
+        @param fix_to_the_root: False if re-balancing after insertion, True if re-balancing after deletion, in which
+                                case the parent of starting_node is splayed
+        @rtype: int
+        @returns: the number of rotations performed
+        """
+        tree.fix_tree_nodes_height_and_sizes(starting_node)
+        node = starting_node.getParent() if fix_to_the_root else starting_node
+        return 0 if node is None else self.splay(tree, node)
+
+    def access(self, tree, node):
+        """
+        splays the retrieved node to the root
+
+        @type tree: AVLTreeList
+        @param tree: the list node belongs to
+        @type node: AVLNode
+        @param node: the retrieved node
+        @rtype: int
+        @returns: the number of rotations performed
+        """
+        return self.splay(tree, node)
+
+    @staticmethod
+    def splay(tree, node):
+        """
+        moves node to the root of tree by zig, zig-zig and zig-zag steps
+
+        @type tree: AVLTreeList
+        @param tree: the list node belongs to
+        @type node: AVLNode
+        @param node: the node to move
+        @rtype: int
+        @returns: the number of rotations performed
+        """
+        rotations_count = 0
+        parent_node = node.getParent()
+        while parent_node is not None:
+            grandparent_node = parent_node.getParent()
+            node_is_left = node == parent_node.getLeft()
+            if grandparent_node is None:  # zig
+                SplayBalancingPolicy.rotate_up(tree, node, node_is_left)
+                rotations_count += 1
+            elif node_is_left == (parent_node == grandparent_node.getLeft()):  # zig-zig
+                SplayBalancingPolicy.rotate_up(tree, parent_node, node_is_left)
+                SplayBalancingPolicy.rotate_up(tree, node, node_is_left)
+                rotations_count += 2
+            else:  # zig-zag
+                SplayBalancingPolicy.rotate_up(tree, node, node_is_left)
+                SplayBalancingPolicy.rotate_up(tree, node, not node_is_left)
+                rotations_count += 2
+            parent_node = node.getParent()
+        return rotations_count
+
+    @staticmethod
+    def rotate_up(tree, node, node_is_left):
+        """
+        rotates node with its parent, so that node takes its parent's place
+
+        @type tree: AVLTreeList
+        @param tree: the list node belongs to
+        @type node: AVLNode
+        @param node: a node which is not the root
+        @type node_is_left: bool
+        @param node_is_left: True if node is the left child of its parent, False otherwise
+        """
+        if node_is_left:
+            tree.right_rotation(node.getParent())
+        else:
+            tree.left_rotation(node.getParent())
+
+
 class AVLTreeList(object):
     """
     A class implementing the ADT list, using an AVL tree.
     """
+    RETRIEVE_MANY_FINGER_RATIO = 64  # retrieve_many uses finger search for at least length() / 64 indices
 
-    def __init__(self):
+    def __init__(self, balancing_policy=None, hashed=False):
         """
         Constructor, you are allowed to add more fields.
+
+        @type balancing_policy: AVLBalancingPolicy or None
+        @param balancing_policy: the policy re-balancing the tree, None for AVL re-balancing
+        @type hashed: bool
+        @param hashed: True to keep content hashes in the nodes, for __eq__, range_hash and diff in O(log n)
         """
+        self.balancing_policy = AVLBalancingPolicy() if balancing_policy is None else balancing_policy
+        self.hashed = hashed
         self.size = 0
         self.root = None
         self.first_node = None
         self.last_node = None
+        self.journal = None
+        self.version = 0  # incremented by every mutation, views of self are valid only while it is unchanged
+        self.compaction_factor = None
+        self.read_optimized = False
+        self.cache_patching = True
+        self.cache_nodes = None
+        self.cache_values = None
+        self.cache_index = None
+        self.cache_version = -1  # the version of self the positional cache was built for
 
     def update_tree_fields(self, root, first_node, last_node):
         """
@@ -298,6 +631,19 @@ class AVLTreeList(object):
         self.set_first_node(first_node)
         self.set_last_node(last_node)
 
+    def create_node(self, value, is_real=True):
+        """
+        creates a new node to be linked into the tree representing the list
+
+        @type value: str or None
+        @param value: data of the new node
+        @type is_real: bool
+        @param is_real: False if the new node is virtual, True otherwise
+        @rtype: AVLNode
+        @returns: a new node, not linked to any other node
+        """
+        return HashedAVLNode(value, is_real) if self.hashed else AVLNode(value, is_real)
+
     def empty(self):
         """
         returns whether the list is empty
@@ -317,15 +663,34 @@ class AVLTreeList(object):
         @rtype: AVLNode
         @returns: the i'th item in the list
         """
-        def retrieve_rec(node, k):
-            r = node.getLeft().getSize() + 1
-            if r == k:
-                return node
-            elif r > k:
-                return retrieve_rec(node.left, k)
-            return retrieve_rec(node.right, k - r)
+        if self.read_optimized and self.cache_version == self.version:
+            return self.cache_nodes[i]
+        node = AVLTreeList.select_node(self.getRoot(), i + 1)
+        self.balancing_policy.access(self, node)
+        return node
+
+    @staticmethod
+    def select_node(node, k):
+        """
+        returns the k'th node in the subtree rooted with node
 
-        return retrieve_rec(self.getRoot(), i + 1)
+        @type node: AVLNode
+        @param node: the root of a subtree
+        @type k: int
+        @pre: 1 <= k <= node.getSize()
+        @param k: rank in the subtree, starting at 1
+        @rtype: AVLNode
+        @returns: the k'th node in the subtree
+        """
+        r = node.getLeft().getSize() + 1
+        while r != k:  # iterative, since a non-AVL balancing policy may leave the tree deep
+            if r > k:
+                node = node.getLeft()
+            else:
+                node = node.getRight()
+                k -= r
+            r = node.getLeft().getSize() + 1
+        return node
 
     def retrieve(self, i):
         """
@@ -338,10 +703,121 @@ class AVLTreeList(object):
         @returns: the value of the i'th item in the list
         """
         if 0 <= i <= self.size - 1:
+            if self.read_optimized:
+                return self.get_positional_cache()[i]
             return self.retrieve_node(i).getValue()
         return None
 
-    def insert(self, i, val):
+    def retrieve_many(self, indices):
+        """
+        retrieves the values of many items at once. Large batches are sorted and resolved by finger search, each
+        index starting from the node of the previous one, in O(k log(n/k)) for k indices. Batches smaller than
+        self.length() / RETRIEVE_MANY_FINGER_RATIO are resolved by a descent from the root per index.
+
+        @type indices: iterable
+        @param indices: indices in the list, as ints or NumPy integers
+        @rtype: list
+        @returns: the values of the items, in the order of indices, None for indices out of range
+        """
+        indices = [operator.index(i) for i in indices]
+        values = [None] * len(indices)
+        if self.read_optimized:
+            cached_values = self.get_positional_cache()
+            for position, i in enumerate(indices):
+                if 0 <= i < self.size:
+                    values[position] = cached_values[i]
+            return values
+        root = self.getRoot()
+        if len(indices) * AVLTreeList.RETRIEVE_MANY_FINGER_RATIO < self.size:
+            for position, i in enumerate(indices):
+                if 0 <= i < self.size:
+                    values[position] = AVLTreeList.select_node(root, i + 1).getValue()
+            return values
+        order = sorted((position for position in range(len(indices)) if 0 <= indices[position] < self.size),
+                       key=indices.__getitem__)
+        node, start, index, value = root, 0, -1, None  # the subtree of node holds the items start, start+1, ...
+        for position in order:
+            i = indices[position]
+            if i != index:
+                while i >= start + node.getSize():  # climbs until the subtree of node holds item i
+                    parent = node.getParent()
+                    if parent.getRight() == node:
+                        start -= parent.getLeft().getSize() + 1
+                    node = parent
+                node = AVLTreeList.select_node(node, i - start + 1)
+                start = i - node.getLeft().getSize()
+                index, value = i, node.getValue()
+            values[position] = value
+        return values
+
+    def set_read_optimized(self, read_optimized, cache_patching=True):
+        """
+        turns the read-optimized mode on or off. In this mode a flat array of the nodes and values of the list is
+        built lazily, and serves retrieve, search and iteration in O(1) until the next mutation.
+
+        @type read_optimized: bool
+        @param read_optimized: True to turn the read-optimized mode on, False to turn it off
+        @type cache_patching: bool
+        @param cache_patching: True to patch the array on insert, delete, replace and clear instead of rebuilding
+                               it on the next read
+        """
+        self.read_optimized = read_optimized
+        self.cache_patching = cache_patching
+        self.cache_nodes = None
+        self.cache_values = None
+        self.cache_index = None
+        self.cache_version = -1
+
+    def get_positional_cache(self):
+        """
+        returns the values of the list, building the positional cache first if it is not up to date
+
+        @pre: self.read_optimized is True
+        @rtype: list
+        @returns: the cached values of the list, which must not be modified
+        """
+        if self.cache_version != self.version:
+            nodes = []
+            node = self.get_first_node()
+            while node is not None:
+                nodes.append(node)
+                node = node.get_successor()
+            self.cache_nodes = nodes
+            self.cache_values = [node.getValue() for node in nodes]
+            self.cache_index = None
+            self.cache_version = self.version
+        return self.cache_values
+
+    def patch_positional_cache(self, op, args):
+        """
+        updates the positional cache after a small mutation, instead of rebuilding it on the next read
+
+        @pre: the cache was up to date before the mutation
+        @type op: int
+        @param op: the mutation, one of Journal.INSERT, Journal.DELETE, Journal.CONCAT, Journal.REPLACE and
+                   Journal.CLEAR
+        @type args: tuple
+        @param args: the arguments of the mutation
+        @rtype: bool
+        @returns: True if the cache was patched, False if it has to be rebuilt
+        """
+        if op == Journal.INSERT:
+            self.cache_nodes.insert(args[0], self.retrieve_node(args[0]))
+            self.cache_values.insert(args[0], args[1])
+        elif op == Journal.DELETE:
+            del self.cache_nodes[args[0]]
+            del self.cache_values[args[0]]
+        elif op == Journal.REPLACE:
+            self.cache_values[args[0]] = args[1]
+        elif op == Journal.CLEAR:
+            self.cache_nodes = []
+            self.cache_values = []
+        else:
+            return False
+        self.cache_index = None
+        return True
+
+    def insert(self, i, val, return_handle=False):
         """
         inserts val at position i in the list
 
@@ -350,28 +826,89 @@ class AVLTreeList(object):
         @param i: The intended index in the list to which we insert val
         @type val: str
         @param val: the value we insert
-        @rtype: int
-        @returns: the number of re-balancing operation due to AVL re-balancing
+        @type return_handle: bool
+        @param return_handle: True to return a handle to the inserted item instead of the re-balancing count
+        @rtype: int or AVLHandle
+        @returns: the number of re-balancing operation due to AVL re-balancing, or a handle to the inserted item if
+                  return_handle is True
         """
-        node = AVLNode(val)
+        node = self.create_node(val)
         node.add_virtual_children()
         if self.empty():
             self.update_tree_fields(node, node, node)
-            return 0
-        if i == self.length():
-            self.get_last_node().setRight(node)
-            self.set_last_node(node)
+            rotations_count = 0
         else:
-            if i == 0:
-                self.set_first_node(node)  # Updating self.first
-            prev_i_node = self.retrieve_node(i)
-            if prev_i_node.getLeft().isRealNode() is False:  # Case 1: prev_node doesn't have left son
-                prev_i_node.setLeft(node)
-            else:  # Case 2: prev_node has left son
-                node_predecessor = prev_i_node.get_predecessor()
-                node_predecessor.setRight(node)
+            if i == self.length():
+                self.get_last_node().setRight(node)
+                self.set_last_node(node)
+            else:
+                if i == 0:
+                    self.set_first_node(node)  # Updating self.first
+                prev_i_node = self.retrieve_node(i)
+                if prev_i_node.getLeft().isRealNode() is False:  # Case 1: prev_node doesn't have left son
+                    prev_i_node.setLeft(node)
+                else:  # Case 2: prev_node has left son
+                    node_predecessor = prev_i_node.get_predecessor()
+                    node_predecessor.setRight(node)
+            rotations_count = self.fix_the_tree(node, False)
+        self.log_mutation(Journal.INSERT, i, val)
+        return AVLHandle(node) if return_handle else rotations_count
+
+    def index_of(self, handle):
+        """
+        returns the current index of the item handle refers to, by climbing from its node to the root
+
+        @type handle: AVLHandle
+        @param handle: a handle returned by insert
+        @rtype: int
+        @returns: the index of the item in the list
+        @raises ValueError: if the item is not in the list
+        """
+        node = handle.getNode()
+        index = node.getLeft().getSize()
+        parent_node = node.getParent()
+        while parent_node is not None:
+            if node == parent_node.getRight():
+                index += parent_node.getLeft().getSize() + 1
+            node = parent_node
+            parent_node = node.getParent()
+        if node != self.getRoot():
+            raise ValueError("the item of the handle is not in the list")
+        return index
+
+    def delete_handle(self, handle):
+        """
+        deletes the item handle refers to, without searching for it by index. The node of handle is detached
+        afterwards, so it can be passed to join as a middle node (except in a DiskAVLTreeList, which reuses the
+        records of deleted nodes)
+
+        @type handle: AVLHandle
+        @param handle: a handle returned by insert
+        @rtype: int
+        @returns: the number of re-balancing operation due to AVL re-balancing
+        @raises ValueError: if the item is not in the list
+        """
+        i = self.index_of(handle)
+        rotations_count = self.delete_node(handle.getNode())
+        self.release_node(handle.getNode())
+        self.log_mutation(Journal.DELETE, i)
+        return rotations_count
+
+    def replace(self, handle, val):
+        """
+        replaces the value of the item handle refers to
 
-        return self.fix_the_tree(node, False)
+        @type handle: AVLHandle
+        @param handle: a handle returned by insert
+        @type val: str
+        @param val: the new value of the item
+        @raises ValueError: if the item is not in the list
+        """
+        i = self.index_of(handle)
+        handle.getNode().setValue(val)
+        if self.hashed:
+            self.fix_tree_nodes_height_and_sizes(handle.getNode())
+        self.log_mutation(Journal.REPLACE, i, val)
 
     def fix_the_tree(self, starting_node, fix_to_the_root):
         """
@@ -384,24 +921,7 @@ class AVLTreeList(object):
         @rtype: int
         @returns: the number of re-balancing operation due to AVL re-balancing
         """
-        rotations_count = 0
-        y = starting_node.getParent()
-        while y is not None:
-            y_old_height = y.getHeight()
-            y.setHeight(y.calc_height())
-            balance_factor = y.getBalanceFactor()
-            if abs(balance_factor) < 2 and y.getHeight() == y_old_height:
-                break
-            elif abs(balance_factor) < 2 and y.getHeight() != y_old_height:
-                y = y.getParent()
-                continue
-            y_parent = y.getParent()
-            rotations_count += self.perform_rotation(y)
-            if fix_to_the_root is False:
-                break
-            y = y_parent
-        self.fix_tree_nodes_height_and_sizes(starting_node)
-        return rotations_count
+        return self.balancing_policy.rebalance(self, starting_node, fix_to_the_root)
 
     def perform_rotation(self, bf_criminal):
         """
@@ -497,17 +1017,33 @@ class AVLTreeList(object):
         """
         if self.empty():
             return -1
+        node = self.retrieve_node(i)
+        rotations_count = self.delete_node(node)
+        self.release_node(node)
+        self.log_mutation(Journal.DELETE, i)
+        return rotations_count
+
+    def delete_node(self, node_to_delete):
+        """deletes node_to_delete from the list without logging it to the journal of self, for internal use only:
+        the version, positional cache, journal and compaction of self do not see the removal, so callers use delete
+        or delete_handle instead
+
+        @type node_to_delete: AVLNode
+        @pre: node_to_delete is a node of self
+        @param node_to_delete: The node to be deleted
+        @rtype: int
+        @returns: the number of re-balancing operation due to AVL re-balancing
+        """
         if self.length() == 1:
             self.update_tree_fields(None, None, None)
             return 0
-        node_to_delete = self.retrieve_node(i)
         physically_deleted_node = node_to_delete
-        if i == 0:
+        if node_to_delete == self.get_first_node():
             self.set_first_node(node_to_delete.get_successor())
-        if i == self.length() - 1:
+        if node_to_delete == self.get_last_node():
             self.set_last_node(node_to_delete.get_predecessor())
         if node_to_delete.isLeaf():  # Case 1: leaf
-            self.replace_node(node_to_delete, AVLNode(None, False), False)
+            self.replace_node(node_to_delete, self.create_node(None, False), False)
         elif node_to_delete.getRight().isRealNode() is False or node_to_delete.getLeft().isRealNode() is False:
             # Case 2: has only 1 child
             node_to_delete_son = node_to_delete.getRight() \
@@ -519,7 +1055,19 @@ class AVLTreeList(object):
             self.replace_node(node_to_delete_suc, node_to_delete_suc.getRight(), False)
             self.replace_node(node_to_delete, node_to_delete_suc, True)
             physically_deleted_node = node_to_delete_suc_parent.getLeft()
-        return self.fix_the_tree(physically_deleted_node, True)
+        rotations_count = self.fix_the_tree(physically_deleted_node, True)
+        node_to_delete.setParent(None)  # detached, so index_of no longer finds it in the list
+        return rotations_count
+
+    def release_node(self, node):
+        """
+        frees the storage of a node deleted by delete or delete_handle, nodes in memory are left to the garbage
+        collector
+
+        @type node: AVLNode
+        @param node: a node which was deleted from self
+        """
+        pass
 
     def replace_node(self, node_to_be_replaced, new_node, has_two_children):
         """
@@ -570,15 +1118,14 @@ class AVLTreeList(object):
         @rtype: list
         @returns: a list of strings representing the data structure
         """
-        def list_to_array_rec(node, lst):
-            if node.isRealNode() is False:
-                return
-            list_to_array_rec(node.getLeft(), lst)
+        if self.read_optimized:
+            return list(self.get_positional_cache())
+        lst = []
+        node = self.get_first_node()
+        while node is not None:
             lst.append(node.getValue())
-            list_to_array_rec(node.getRight(), lst)
-            return lst
-
-        return [] if self.empty() else list_to_array_rec(self.root, [])
+            node = node.get_successor()
+        return lst
 
     def length(self):
         """
@@ -589,6 +1136,46 @@ class AVLTreeList(object):
         """
         return self.getSize()
 
+    def __len__(self):
+        return self.length()
+
+    def __iter__(self):
+        """
+        iterates over the values of the list in order, in O(1) amortized time per value
+
+        @raises RuntimeError: if the list is modified during the iteration
+        """
+        version = self.version
+        if self.read_optimized:
+            for val in self.get_positional_cache():
+                yield val
+                if self.version != version:
+                    raise RuntimeError("AVLTreeList changed during iteration")
+            return
+        node = self.get_first_node()
+        while node is not None:
+            yield node.getValue()
+            if self.version != version:
+                raise RuntimeError("AVLTreeList changed during iteration")
+            node = node.get_successor()
+
+    def view(self, i, j):
+        """
+        returns a read-only view of the items i, i+1, ..., j-1 of the list, without copying them
+
+        @type i: int
+        @type j: int
+        @pre: 0 <= i <= j <= self.length()
+        @param i: index of the first item of the view
+        @param j: index after the last item of the view
+        @rtype: AVLTreeListView
+        @returns: a view which is valid until the next mutation of self
+        @raises IndexError: if the range is not within the list
+        """
+        if not 0 <= i <= j <= self.length():
+            raise IndexError("view range out of range")
+        return AVLTreeListView(self, i, j)
+
     @staticmethod
     def merge(lst1, lst2):
         """
@@ -650,7 +1237,7 @@ class AVLTreeList(object):
         return AVLTreeList.merge(lst1, lst2)
 
     @staticmethod
-    def create_tree_from_list(lst, begin_index, end_index):
+    def create_tree_from_list(lst, begin_index, end_index, node_factory=AVLNode):
         """
         returns AVLNode represents the root of a tree, which linked to all other lst elements represented as AVLNodes 
 
@@ -660,36 +1247,42 @@ class AVLTreeList(object):
         @param begin_index: start index in lst to create the tree from
         @type end_index: int
         @param end_index: end index in lst to create the tree from
+        @type node_factory: callable
+        @param node_factory: called as node_factory(value, is_real) to create each node, AVLNode by default
         @rtype: AVLNode
         @returns: AVLNode represents the root of a tree, which linked to all other lst elements represented as AVLNodes 
         """
         if end_index - begin_index == 1:
-            new_node = AVLNode(lst[begin_index])
+            new_node = node_factory(lst[begin_index], True)
             new_node.add_virtual_children()
             return new_node
         if end_index == begin_index:
-            return AVLNode(None, False)
+            return node_factory(None, False)
         median_index = begin_index + ((end_index - begin_index) // 2)
-        median_node = AVLNode(lst[median_index])
-        median_node.setLeft(AVLTreeList.create_tree_from_list(lst, begin_index, median_index))
-        median_node.setRight(AVLTreeList.create_tree_from_list(lst, median_index + 1, end_index))
+        median_node = node_factory(lst[median_index], True)
+        median_node.setLeft(AVLTreeList.create_tree_from_list(lst, begin_index, median_index, node_factory))
+        median_node.setRight(AVLTreeList.create_tree_from_list(lst, median_index + 1, end_index, node_factory))
         median_node.fix_node_height_and_size()
         return median_node
 
     @staticmethod
-    def make_tree_from_list(lst):
+    def make_tree_from_list(lst, hashed=False, balancing_policy=None):
         """
         returns an AVLTreeList containing all elements in lst  
 
         @type lst: list
         @param lst: the list to be "converted" to an AVLTreeList
+        @type hashed: bool
+        @param hashed: True to return a list keeping content hashes
+        @type balancing_policy: AVLBalancingPolicy or None
+        @param balancing_policy: the balancing policy of the returned list, AVL balancing if None
         @rtype: AVLTreeList
         @returns: an AVLTreeList containing all elements in lst
         """
         if len(lst) == 0:
-            return AVLTreeList()
-        lst_root = AVLTreeList.create_tree_from_list(lst, 0, len(lst))
-        new_tree = AVLTreeList()
+            return AVLTreeList(balancing_policy, hashed)
+        lst_root = AVLTreeList.create_tree_from_list(lst, 0, len(lst), HashedAVLNode if hashed else AVLNode)
+        new_tree = AVLTreeList(balancing_policy, hashed)
         first_node = lst_root.find_first_node()
         last_node = lst_root.find_last_node()
         new_tree.update_tree_fields(lst_root, first_node, last_node)
@@ -710,7 +1303,7 @@ class AVLTreeList(object):
             sorted_lst = AVLTreeList.mergesort(lst_without_none, 0, len(lst_without_none))
         for i in range(none_count):
             sorted_lst.append(None)
-        return AVLTreeList.make_tree_from_list(sorted_lst)
+        return AVLTreeList.make_tree_from_list(sorted_lst, self.hashed)
 
     def permutation(self):
         """
@@ -723,7 +1316,7 @@ class AVLTreeList(object):
         for i in range(len(lst_tree) - 1, 0, -1):
             random_element_index = random.randint(0, i)
             lst_tree[i], lst_tree[random_element_index] = lst_tree[random_element_index], lst_tree[i]
-        return AVLTreeList.make_tree_from_list(lst_tree)
+        return AVLTreeList.make_tree_from_list(lst_tree, self.hashed)
 
     @staticmethod
     def concat_helper(higher_tree, lower_tree, self_is_higher, mid_node):
@@ -773,77 +1366,553 @@ class AVLTreeList(object):
             return 0
         if self.empty():
             self.update_tree_fields(lst.getRoot(), lst.get_first_node(), lst.get_last_node())
+            lst.update_tree_fields(None, None, None)
         return self.getRoot().getHeight() + 1
 
-    def concat_trees_with_one_element(self, lst):
+    def concat(self, lst):
         """
-        concatenates lst to self when one/two of them has one element
+        concatenates lst to self, lst is left empty
 
         @type lst: AVLTreeList
         @param lst: a list to be concatenated after self
+        @rtype: int
+        @returns: the absolute value of the difference between the height of the AVL trees joined
         """
-        if lst.size == 1:
-            self.get_last_node().setRight(lst.getRoot())
-            self.set_last_node(lst.getRoot())
-            self.fix_the_tree(self.get_last_node(), False)
-        elif self.getSize() == 1:  # lst.length() > 1
-            lst_first = lst.get_first_node()
-            lst.delete(0)
-            node = AVLTreeList.concat_helper(lst, self, False, lst_first)
-            self.fix_the_tree(node, True)
+        lst_values = None if self.journal is None else lst.listToArray()  # lst is copied only to be logged
+        return_val = self.concat_trees(lst)
+        self.log_mutation(Journal.CONCAT, lst_values)
+        lst.clear()
+        return return_val
 
-    def concat(self, lst):
+    def concat_trees(self, lst):
         """
-        concatenates lst to self
+        concatenates lst to self without logging it to the journal of self, lst is left empty (when its nodes are
+        stored elsewhere they are copied in first, see adopt)
 
         @type lst: AVLTreeList
         @param lst: a list to be concatenated after self
         @rtype: int
         @returns: the absolute value of the difference between the height of the AVL trees joined
         """
-        self_last = self.get_last_node()
+        self.check_joinable(lst)
+        lst = self.adopt(lst)
         if self.empty() or lst.empty():  # Case 1: one of the lists is empty
             return self.concat_empty_trees(lst)
         return_val = abs(lst.getRoot().getHeight() - self.getRoot().getHeight())
-        if lst.getSize() == 1 or self.getSize() == 1:  # Case 2: one of the lists has only one element
-            self.concat_trees_with_one_element(lst)
-            return return_val
-        #  Case 3: both lists has more than one element
-        self.delete(self.length() - 1)
-        lst_height = lst.getRoot().getHeight()
-        self_height = self.getRoot().getHeight()
-        if abs(self_height - lst_height) < 2:  # Case 3.1: |height difference| <= 1
-            self_last.update_node_fields(lst.getRoot(), self.getRoot(), None)
-            self.update_tree_fields(self_last, self.get_first_node(), lst.get_last_node())
-            return return_val
-        elif self_height > lst_height:  # Case 3.2: self is higher than lst
-            node = AVLTreeList.concat_helper(self, lst, True, self_last)
-        else:  # Case 3.3: lst is higher than self
-            node = AVLTreeList.concat_helper(lst, self, False, self_last)
-        self.fix_the_tree(node, True)
+        # Case 2: the middle node is taken out of the smaller list, so a list with one element costs no deletion
+        if lst.getSize() <= self.getSize():
+            mid_node = lst.get_first_node()
+            lst.delete_node(mid_node)
+        else:
+            mid_node = self.get_last_node()
+            self.delete_node(mid_node)
+        self.link_trees(mid_node, lst)
         return return_val
 
-    def search(self, val):
+    def join(self, mid_node, lst):
         """
-        searches for a *value* in the list
+        concatenates mid_node and then lst to self, lst is left empty
 
-        @type val: str
-        @param val: a value to be searched
+        @type mid_node: AVLNode
+        @pre: mid_node is a real node, created by self.create_node or detached by delete_handle from an in-memory
+              list, if self is in memory too
+        @param mid_node: the node to be placed between the items of self and the items of lst
+        @type lst: AVLTreeList
+        @param lst: a list to be concatenated after mid_node
         @rtype: int
-        @returns: the first index that contains val, -1 if not found.
+        @returns: the number of re-balancing operation due to AVL re-balancing
         """
-        tree_as_lst = self.listToArray()
-        for i in range(len(tree_as_lst)):
-            if tree_as_lst[i] == val:
-                return i
-        return -1
+        lst_values = None if self.journal is None else [mid_node.getValue()] + lst.listToArray()
+        rotations_count = self.join_trees(mid_node, lst)
+        self.log_mutation(Journal.CONCAT, lst_values)
+        lst.clear()
+        return rotations_count
 
-    def getRoot(self):
+    def join_trees(self, mid_node, lst):
         """
-        returns the root of the tree representing the list
+        concatenates mid_node and then lst to self without logging it to the journal of self, lst is left empty
+        (when its nodes are stored elsewhere they are copied in first, see adopt)
 
-        @rtype: AVLNode
-        @returns: the root, None if the list is empty
+        @type mid_node: AVLNode
+        @pre: mid_node is a real node which is not linked to any list
+        @param mid_node: the node to be placed between the items of self and the items of lst
+        @type lst: AVLTreeList
+        @param lst: a list to be concatenated after mid_node
+        @rtype: int
+        @returns: the number of re-balancing operation due to AVL re-balancing
+        """
+        self.check_joinable(lst)
+        return self.link_trees(mid_node, self.adopt(lst))
+
+    def link_trees(self, mid_node, lst):
+        """
+        concatenates mid_node and then lst to self without logging it to the journal of self, lst is left empty
+
+        @type mid_node: AVLNode
+        @pre: mid_node is a real node which is not linked to any list, created in the same store as self
+        @param mid_node: the node to be placed between the items of self and the items of lst
+        @type lst: AVLTreeList
+        @pre: the nodes of lst are stored with the nodes of self (see adopt)
+        @param lst: a list to be concatenated after mid_node
+        @rtype: int
+        @returns: the number of re-balancing operation due to AVL re-balancing
+        """
+        mid_node.add_virtual_children()
+        mid_node.setParent(None)
+        mid_node.fix_node_height_and_size()
+        if self.empty() and lst.empty():  # Case 1: mid_node is the only node
+            self.update_tree_fields(mid_node, mid_node, mid_node)
+            return 0
+        if lst.empty():  # Case 2: mid_node is inserted last
+            self.get_last_node().setRight(mid_node)
+            self.set_last_node(mid_node)
+            return self.fix_the_tree(mid_node, False)
+        if self.empty():  # Case 3: mid_node is inserted first to lst, which is moved to self
+            lst.get_first_node().setLeft(mid_node)
+            self.update_tree_fields(lst.getRoot(), mid_node, lst.get_last_node())
+            lst.update_tree_fields(None, None, None)
+            return self.fix_the_tree(mid_node, False)
+        lst_height = lst.getRoot().getHeight()
+        self_height = self.getRoot().getHeight()
+        if abs(self_height - lst_height) < 2:  # Case 4.1: |height difference| <= 1
+            mid_node.update_node_fields(lst.getRoot(), self.getRoot(), None)
+            self.update_tree_fields(mid_node, self.get_first_node(), lst.get_last_node())
+            rotations_count = 0
+        else:
+            if self_height > lst_height:  # Case 4.2: self is higher than lst
+                node = AVLTreeList.concat_helper(self, lst, True, mid_node)
+            else:  # Case 4.3: lst is higher than self
+                node = AVLTreeList.concat_helper(lst, self, False, mid_node)
+            rotations_count = self.fix_the_tree(node, True)
+        lst.update_tree_fields(None, None, None)
+        return rotations_count
+
+    def concat_many(self, lists):
+        """
+        concatenates all lists to self in order, the lists are left empty. Adjacent lists are joined lowest first,
+        so that every join is between trees of similar heights.
+
+        @type lists: list
+        @param lists: AVLTreeLists to be concatenated after self
+        @raises ValueError: if a list appears more than once in lists, or see check_joinable
+        """
+        lists = list(lists)
+        for lst in lists:
+            self.check_joinable(lst)
+        if len(set(id(lst) for lst in lists)) != len(lists):
+            raise ValueError("cannot join a list more than once")
+        lists_values = None if self.journal is None else [val for lst in lists for val in lst.listToArray()]
+        pieces = [self] + [self.adopt(lst) for lst in lists if not lst.empty()]  # all in the store of self
+        right = [k + 1 for k in range(len(pieces) - 1)] + [None]
+        left = [None] + [k for k in range(len(pieces) - 1)]
+        versions = [0] * len(pieces)
+        heap = [(AVLTreeList.join_height(pieces[k], pieces[k + 1]), k, k + 1, 0, 0) for k in range(len(pieces) - 1)]
+        heapq.heapify(heap)
+        while heap:
+            _, k, r, k_version, r_version = heapq.heappop(heap)
+            if right[k] != r or versions[k] != k_version or versions[r] != r_version:  # stale pair
+                continue
+            pieces[k].concat_trees(pieces[r])
+            versions[k] += 1
+            right[k] = right[r]
+            right[r] = None
+            if right[k] is not None:
+                left[right[k]] = k
+                heapq.heappush(heap, (AVLTreeList.join_height(pieces[k], pieces[right[k]]), k, right[k],
+                                      versions[k], versions[right[k]]))
+            if left[k] is not None:
+                heapq.heappush(heap, (AVLTreeList.join_height(pieces[left[k]], pieces[k]), left[k], k,
+                                      versions[left[k]], versions[k]))
+        self.log_mutation(Journal.CONCAT, lists_values)
+        for lst in lists:
+            lst.clear()
+
+    def check_joinable(self, lst):
+        """
+        checks that the nodes of lst can be linked into the tree of self
+
+        @type lst: AVLTreeList
+        @param lst: a list to be joined to self
+        @raises ValueError: if lst is self, or if only one of self and lst keeps content hashes
+        """
+        if lst is self:
+            raise ValueError("cannot join a list to itself")
+        if not lst.empty() and self.hashed != lst.hashed:
+            raise ValueError("cannot join a hashed list with a list which is not hashed")
+
+    def get_node_store(self):
+        """
+        returns the list whose files hold the nodes of self
+
+        @rtype: DiskAVLTreeList or None
+        @returns: the DiskAVLTreeList storing the nodes of self, None if they are in memory or self is empty
+        """
+        root = self.getRoot()
+        return root.tree if isinstance(root, DiskAVLNode) else None
+
+    def adopt(self, lst):
+        """
+        returns a list with the items of lst whose nodes can be linked into the tree of self, lst is not changed
+
+        @type lst: AVLTreeList
+        @param lst: a list
+        @rtype: AVLTreeList
+        @returns: lst if it is empty or its nodes are stored with the nodes of self, otherwise a copy of lst whose
+                  nodes are created by self.create_node
+        """
+        if lst.empty() or lst.get_node_store() is self.get_node_store():
+            return lst
+        values = lst.listToArray()
+        copied_root = AVLTreeList.create_tree_from_list(values, 0, len(values), self.create_node)
+        copied_lst = AVLTreeList(hashed=self.hashed)
+        copied_lst.update_tree_fields(copied_root, copied_root.find_first_node(), copied_root.find_last_node())
+        return copied_lst
+
+    @staticmethod
+    def join_height(lst1, lst2):
+        """
+        returns the height of the higher tree of two lists
+
+        @type lst1: AVLTreeList
+        @param lst1: a list
+        @type lst2: AVLTreeList
+        @param lst2: a list
+        @rtype: int
+        @returns: the height of the higher tree, -1 if both lists are empty
+        """
+        return max(-1 if lst.empty() else lst.getRoot().getHeight() for lst in (lst1, lst2))
+
+    def clear(self):
+        """
+        removes all items of the list
+        """
+        self.update_tree_fields(None, None, None)
+        self.log_mutation(Journal.CLEAR)
+
+    def __eq__(self, other):
+        """
+        returns whether self and other hold equal items in the same order, comparing root hashes when both lists
+        are hashed (equal hashes of different lists are possible but very unlikely, while equal values always have
+        equal hashes)
+
+        @type other: AVLTreeList
+        @param other: a list
+        @rtype: bool
+        @returns: True if the lists are equal, False otherwise
+        """
+        if not isinstance(other, AVLTreeList):
+            return NotImplemented
+        if self.length() != other.length():
+            return False
+        if self.hashed and other.hashed:
+            return self.range_hash(0, self.length()) == other.range_hash(0, other.length())
+        return self.listToArray() == other.listToArray()
+
+    __hash__ = None
+
+    def prefix_hash(self, k):
+        """
+        returns the hash of the first k items of the list
+
+        @type k: int
+        @pre: self.hashed is True and 0 <= k <= self.length()
+        @param k: number of items
+        @rtype: int
+        @returns: the hash of the first k items
+        """
+        prefix = 0
+        node = self.getRoot()
+        while k > 0:
+            if k == node.getSize():
+                return HashedAVLNode.combine(prefix, node.hash, node.power)
+            left = node.getLeft()
+            if k <= left.getSize():
+                node = left
+                continue
+            prefix = HashedAVLNode.combine(prefix, HashedAVLNode.hash_of(left), HashedAVLNode.power_of(left))
+            prefix = HashedAVLNode.combine(prefix, node.value_hash, HashedAVLNode.BASE)
+            k -= left.getSize() + 1
+            node = node.getRight()
+        return prefix
+
+    def range_hash(self, i, j):
+        """
+        returns the hash of the items i, i+1, ..., j-1 of the list, in O(log n)
+
+        @type i: int
+        @type j: int
+        @pre: 0 <= i <= j <= self.length()
+        @param i: index of the first item
+        @param j: index after the last item
+        @rtype: int
+        @returns: the hash of the items, equal for equal sequences in any hashed list
+        @raises ValueError: if self is not hashed
+        """
+        if not self.hashed:
+            raise ValueError("range_hash requires a hashed list")
+        shift = pow(HashedAVLNode.BASE, j - i, HashedAVLNode.MODULUS)
+        return (self.prefix_hash(j) - self.prefix_hash(i) * shift) % HashedAVLNode.MODULUS
+
+    def diff(self, other):
+        """
+        returns the indices at which self and other differ, descending only into subtrees of self whose hash does
+        not match the hash of the same range in other, so d differences cost O(d log^2 n)
+
+        @type other: AVLTreeList
+        @param other: a hashed list
+        @rtype: list
+        @returns: the sorted indices i for which self.retrieve(i) != other.retrieve(i), including every index that
+                  exists in only one of the lists
+        @raises ValueError: if self or other is not hashed
+        """
+        if not (self.hashed and other.hashed):
+            raise ValueError("diff requires two hashed lists")
+        common = min(self.length(), other.length())
+        indices = []
+        stack = [] if self.empty() else [(self.getRoot(), 0)]
+        while stack:
+            node, offset = stack.pop()
+            if not node.isRealNode() or offset >= common:
+                continue
+            end = offset + node.getSize()
+            if end <= common and node.hash == other.range_hash(offset, end):
+                continue
+            index = offset + node.getLeft().getSize()
+            if index < common and node.value_hash != other.range_hash(index, index + 1):
+                indices.append(index)
+            stack.append((node.getLeft(), offset))
+            stack.append((node.getRight(), index + 1))
+        indices.sort()
+        indices.extend(range(common, max(self.length(), other.length())))
+        return indices
+
+    def create_tree_from_nodes(self, nodes, begin_index, end_index):
+        """
+        links the nodes of a list into a perfectly balanced tree and returns its root, like create_tree_from_list
+
+        @type nodes: List
+        @param nodes: list of the real nodes of self, in order
+        @type begin_index: int
+        @param begin_index: start index in nodes to create the tree from
+        @type end_index: int
+        @param end_index: end index in nodes to create the tree from
+        @rtype: AVLNode
+        @returns: AVLNode represents the root of a tree, which linked to all other nodes
+        """
+        if end_index == begin_index:
+            return self.create_node(None, False)
+        median_index = begin_index + ((end_index - begin_index) // 2)
+        median_node = nodes[median_index]
+        median_node.setLeft(self.create_tree_from_nodes(nodes, begin_index, median_index))
+        median_node.setRight(self.create_tree_from_nodes(nodes, median_index + 1, end_index))
+        median_node.fix_node_height_and_size()
+        return median_node
+
+    def compact(self):
+        """
+        rebuilds the tree into a perfectly balanced shape in O(n), reusing its nodes, so that its height is the
+        minimal floor(log2(n)). Handles to the items stay valid.
+        """
+        if self.empty():
+            return
+        nodes = []
+        node = self.get_first_node()
+        while node is not None:
+            nodes.append(node)
+            node = node.get_successor()
+        root = self.create_tree_from_nodes(nodes, 0, len(nodes))
+        root.setParent(None)
+        self.update_tree_fields(root, nodes[0], nodes[-1])
+
+    def set_compaction_factor(self, factor):
+        """
+        sets the factor of the minimal height above which the tree is compacted after a mutation
+
+        @type factor: float or None
+        @pre: factor is None or factor >= 1
+        @param factor: the allowed ratio between the height of the tree and the minimal height, None to never
+                       compact automatically
+        """
+        self.compaction_factor = factor
+
+    def needs_compaction(self):
+        """
+        returns whether the tree is higher than its compaction factor allows
+
+        @rtype: bool
+        @returns: True if the tree should be compacted, False otherwise
+        """
+        if self.compaction_factor is None or self.empty():
+            return False
+        minimal_height = self.length().bit_length() - 1
+        return self.getRoot().getHeight() > self.compaction_factor * max(1, minimal_height)
+
+    def set_journal(self, journal):
+        """
+        starts logging the mutations of self to journal, after taking a checkpoint of self
+
+        @type journal: Journal or None
+        @param journal: the journal to log to, None to stop logging
+        """
+        if journal is not None:
+            journal.checkpoint(self.listToArray())
+        self.journal = journal
+
+    def get_journal(self):
+        """
+        returns the journal self logs its mutations to
+
+        @rtype: Journal
+        @returns: the journal of self, None if self is not journaled
+        """
+        return self.journal
+
+    def log_mutation(self, op, *args):
+        """
+        records a mutation of self once it was performed: invalidates the views of self, patches or invalidates its
+        positional cache, compacts the tree if it became too high, appends a record to the journal of self and
+        takes a checkpoint when it is due
+
+        @type op: int
+        @param op: the mutation, one of Journal.INSERT, Journal.DELETE, Journal.CONCAT, Journal.REPLACE and
+                   Journal.CLEAR
+        @param args: the arguments of the mutation, only used when self has a journal
+        """
+        cache_was_valid = self.read_optimized and self.cache_version == self.version
+        self.version += 1
+        if cache_was_valid and self.cache_patching and self.patch_positional_cache(op, args):
+            self.cache_version = self.version
+        if self.needs_compaction():
+            self.compact()
+        if self.journal is None:
+            return
+        self.journal.append(op, args)
+        if self.journal.needs_checkpoint():
+            self.journal.checkpoint(self.listToArray())
+
+    def apply_log_record(self, op, args):
+        """
+        performs a mutation read back from a journal
+
+        @type op: int
+        @param op: the mutation, one of Journal.INSERT, Journal.DELETE, Journal.CONCAT, Journal.REPLACE and
+                   Journal.CLEAR
+        @type args: tuple
+        @param args: the arguments of the mutation
+        """
+        if op == Journal.INSERT:
+            self.insert(*args)
+        elif op == Journal.DELETE:
+            self.delete(*args)
+        elif op == Journal.CONCAT:
+            self.concat(AVLTreeList.make_tree_from_list(args[0], self.hashed))
+        elif op == Journal.REPLACE:
+            self.replace(AVLHandle(self.retrieve_node(args[0])), args[1])
+        elif op == Journal.CLEAR:
+            self.clear()
+        else:
+            raise ValueError("unknown journal record %r" % (op,))
+
+    @staticmethod
+    def recover(journal, hashed=False, balancing_policy=None):
+        """
+        returns the list logged to journal, rebuilt from its latest checkpoint and the log records after it
+
+        @type journal: Journal
+        @param journal: the journal to recover from, it is attached to the returned list
+        @type hashed: bool
+        @param hashed: True to return a list keeping content hashes, as the logged list did
+        @type balancing_policy: AVLBalancingPolicy or None
+        @param balancing_policy: the balancing policy of the returned list, AVL balancing if None
+        @rtype: AVLTreeList
+        @returns: the list as of the last record that reached the log
+        """
+        values, records = journal.recover()
+        tree = AVLTreeList.make_tree_from_list(values, hashed, balancing_policy)
+        for op, args in records:
+            tree.apply_log_record(op, args)
+        tree.journal = journal
+        return tree
+
+    def search(self, val):
+        """
+        searches for a *value* in the list
+
+        @type val: str
+        @param val: a value to be searched
+        @rtype: int
+        @returns: the first index that contains val, -1 if not found.
+        """
+        if self.read_optimized:
+            return self.search_positional_cache(val)
+        tree_as_lst = self.listToArray()
+        for i in range(len(tree_as_lst)):
+            if tree_as_lst[i] == val:
+                return i
+        return -1
+
+    def search_positional_cache(self, val):
+        """
+        searches for a *value* in the list using a lazily built map from values to their first index, in O(1) for
+        hashable values
+
+        @pre: self.read_optimized is True
+        @type val: str
+        @param val: a value to be searched
+        @rtype: int
+        @returns: the first index that contains val, -1 if not found.
+        """
+        values = self.get_positional_cache()
+        if self.cache_index is None:
+            cache_index = {}
+            try:
+                for i in range(len(values) - 1, -1, -1):
+                    cache_index[values[i]] = i
+                self.cache_index = cache_index
+            except TypeError:  # an unhashable value, the list is searched linearly
+                pass
+        if self.cache_index is not None:
+            try:
+                return self.cache_index.get(val, -1)
+            except TypeError:
+                pass
+        for i in range(len(values)):
+            if values[i] == val:
+                return i
+        return -1
+
+    def freeze_to_shared_memory(self, name=None):
+        """
+        copies the list into a new shared memory block, which other processes can read without copying it
+
+        @type name: str or None
+        @param name: the name of the block, None for a generated name
+        @rtype: FrozenAVLTreeList
+        @returns: a read-only list over the block, whose getName() is passed to FrozenAVLTreeList.attach in other
+                  processes and whose unlink() frees the block
+        """
+        data = [pickle.dumps(val, pickle.HIGHEST_PROTOCOL) for val in self.listToArray()]
+        offsets_start = FrozenAVLTreeList.HEADER.size
+        data_start = offsets_start + FrozenAVLTreeList.OFFSET_SIZE * (len(data) + 1)
+        data_size = sum(len(val_data) for val_data in data)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(1, data_start + data_size))
+        FrozenAVLTreeList.HEADER.pack_into(shm.buf, 0, FrozenAVLTreeList.MAGIC, len(data))
+        offsets = shm.buf[offsets_start:data_start].cast('q')
+        offset = 0
+        for i in range(len(data)):
+            offsets[i] = offset
+            shm.buf[data_start + offset:data_start + offset + len(data[i])] = data[i]
+            offset += len(data[i])
+        offsets[len(data)] = offset
+        offsets.release()
+        return FrozenAVLTreeList(shm, True)
+
+    def getRoot(self):
+        """
+        returns the root of the tree representing the list
+
+        @rtype: AVLNode
+        @returns: the root, None if the list is empty
         """
         return self.root
 
@@ -910,3 +1979,980 @@ class AVLTreeList(object):
         """
         self.last_node = last_node
         
+
+
+class DiskAVLNode(AVLNode):
+    """
+    A class representing a node of a DiskAVLTreeList, stored as a fixed-size record in a memory-mapped file.
+    Virtual nodes are not stored, a missing child is read back as a new virtual AVLNode.
+    """
+
+    def __init__(self, tree, index):
+        """
+        Constructor, a node object is only a view of its record, so many objects may represent the same node.
+
+        @type tree: DiskAVLTreeList
+        @param tree: the list whose file holds the record
+        @type index: int
+        @param index: the index of the record in the file
+        """
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, DiskAVLNode) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self):
+        return hash(self.index)
+
+    def getLeft(self):
+        """
+        returns the left child
+
+        @rtype: AVLNode
+        @returns: the left child of self, a virtual node if there is no left child
+        """
+        return self.tree.node_at(self.tree.read_field(self.index, DiskAVLTreeList.LEFT), self)
+
+    def getRight(self):
+        """
+        returns the right child
+
+        @rtype: AVLNode
+        @returns: the right child of self, a virtual node if there is no right child
+        """
+        return self.tree.node_at(self.tree.read_field(self.index, DiskAVLTreeList.RIGHT), self)
+
+    def getParent(self):
+        """
+        returns the parent
+
+        @rtype: AVLNode
+        @returns: the parent of self, None if there is no parent
+        """
+        parent_index = self.tree.read_field(self.index, DiskAVLTreeList.PARENT)
+        return None if parent_index == DiskAVLTreeList.NIL else DiskAVLNode(self.tree, parent_index)
+
+    def getValue(self):
+        """
+        return the value
+
+        @rtype: str
+        @returns: the value of self, read from the heap file
+        """
+        return self.tree.read_value(self.tree.read_field(self.index, DiskAVLTreeList.VALUE))
+
+    def getHeight(self):
+        """
+        returns the height
+
+        @rtype: int
+        @returns: the height of self
+        """
+        return self.tree.read_field(self.index, DiskAVLTreeList.HEIGHT)
+
+    def getSize(self):
+        """
+        returns the size
+
+        @rtype: int
+        @returns: the size of self
+        """
+        return self.tree.read_field(self.index, DiskAVLTreeList.SIZE)
+
+    def setLeft(self, node):
+        """
+        sets left child and sets node's parent accordingly.
+
+        @type node: AVLNode
+        @param node: a node of self.tree or a virtual node
+        """
+        self.tree.write_field(self.index, DiskAVLTreeList.LEFT, DiskAVLTreeList.index_of_node(node))
+        node.setParent(self)
+
+    def setRight(self, node):
+        """
+        sets right child and sets node's parent accordingly.
+
+        @type node: AVLNode
+        @param node: a node of self.tree or a virtual node
+        """
+        self.tree.write_field(self.index, DiskAVLTreeList.RIGHT, DiskAVLTreeList.index_of_node(node))
+        node.setParent(self)
+
+    def setParent(self, node):
+        """
+        sets parent
+
+        @type node: DiskAVLNode or None
+        @param node: a node
+        """
+        self.tree.write_field(self.index, DiskAVLTreeList.PARENT, DiskAVLTreeList.index_of_node(node))
+
+    def setValue(self, value):
+        """
+        sets value, storing it in the heap file and freeing the heap block of the previous value
+
+        @type value: str or None
+        @param value: data
+        """
+        old_offset = self.tree.read_field(self.index, DiskAVLTreeList.VALUE)
+        self.tree.write_field(self.index, DiskAVLTreeList.VALUE, self.tree.write_value(value))
+        self.tree.free_value(old_offset)
+
+    def setHeight(self, h):
+        """
+        sets the height  of the node
+
+        @type h: int
+        @param h: the height
+        """
+        self.tree.write_field(self.index, DiskAVLTreeList.HEIGHT, h)
+
+    def setSize(self, s):
+        """
+        sets the size of the node
+
+        @type s: int
+        @param s: the size
+        """
+        self.tree.write_field(self.index, DiskAVLTreeList.SIZE, s)
+
+    def isRealNode(self):
+        """
+        returns whether self is not a virtual node
+
+        @rtype: bool
+        @returns: True, virtual nodes are never stored
+        """
+        return True
+
+
+class DiskAVLTreeList(AVLTreeList):
+    """
+    A class implementing the ADT list, using an AVL tree whose nodes live in a memory-mapped file.
+
+    The node file holds a header followed by fixed-size records (left, right, parent, size, height and value offset),
+    and values are pickled into blocks of a heap file next to it. Only the records touched by an operation are
+    read, so an existing list is opened in O(1). The records of deleted nodes are chained through their left field
+    into a free list, and the heap blocks of replaced or deleted values into one free list per power-of-two block
+    size, so both files are reused under churn (and handles of deleted items must not be used anymore).
+    """
+    MAGIC = b'AVLTLIST'
+    HEADER = struct.Struct('<8s8q')  # magic, capacity, count, root, first, last, size, heap end, free record
+    CAPACITY, COUNT, ROOT, FIRST, LAST, SIZE_FIELD, HEAP_END, FREE_RECORD = 8, 16, 24, 32, 40, 48, 56, 64
+    BLOCK_CLASSES = 48  # a heap block of class c holds 2 ** c bytes, its length field included
+    FREE_BLOCKS = struct.Struct('<%dq' % BLOCK_CLASSES)  # first free block of each class, after the header
+    MIN_BLOCK_CLASS = 4  # a free block keeps the offset of the next free block of its class after its length
+    RECORD_SIZE = 48
+    LEFT, RIGHT, PARENT, SIZE, HEIGHT, VALUE = 0, 8, 16, 24, 32, 40
+    FIELD = struct.Struct('<q')
+    NIL = -1
+    INITIAL_CAPACITY = 16
+
+    def __init__(self, path, balancing_policy=None):
+        """
+        Constructor, opens the list stored in path, or creates an empty one if path does not exist.
+
+        @type path: str
+        @param path: path of the node file, values are stored in path + '.heap'
+        @type balancing_policy: AVLBalancingPolicy or None
+        @param balancing_policy: the policy re-balancing the tree, None for AVL re-balancing
+        @raises ValueError: if path exists but is not a list file, is truncated or has no heap file
+        """
+        AVLTreeList.__init__(self, balancing_policy)
+        self.path = path
+        is_new = not os.path.exists(path)
+        if not is_new and not os.path.exists(path + '.heap'):
+            raise ValueError("%s has no heap file" % path)
+        self.node_file = open(path, 'w+b' if is_new else 'r+b')
+        self.heap_file = open(path + '.heap', 'w+b' if is_new else 'r+b')
+        if is_new:
+            self.node_file.write(DiskAVLTreeList.HEADER.pack(DiskAVLTreeList.MAGIC, DiskAVLTreeList.INITIAL_CAPACITY,
+                                                             0, DiskAVLTreeList.NIL, DiskAVLTreeList.NIL,
+                                                             DiskAVLTreeList.NIL, 0, 0, DiskAVLTreeList.NIL))
+            self.node_file.write(DiskAVLTreeList.FREE_BLOCKS.pack(
+                *[DiskAVLTreeList.NIL] * DiskAVLTreeList.BLOCK_CLASSES))
+            self.node_file.truncate(self.file_size(DiskAVLTreeList.INITIAL_CAPACITY))
+            self.node_file.flush()
+        file_size = os.fstat(self.node_file.fileno()).st_size
+        if file_size < DiskAVLTreeList.file_size(0):  # mmap fails on an empty file
+            self.node_file.close()
+            self.heap_file.close()
+            raise ValueError("%s is not a DiskAVLTreeList file" % path)
+        self.mm = mmap.mmap(self.node_file.fileno(), 0)
+        magic, self.capacity, self.count, root, first, last, self.size, self.heap_end, self.free_record = \
+            DiskAVLTreeList.HEADER.unpack_from(self.mm, 0)
+        self.free_blocks = list(DiskAVLTreeList.FREE_BLOCKS.unpack_from(self.mm, DiskAVLTreeList.HEADER.size))
+        if magic != DiskAVLTreeList.MAGIC or file_size < DiskAVLTreeList.file_size(self.capacity):
+            self.close()
+            raise ValueError("%s is not a DiskAVLTreeList file" % path)
+        self.root = self.node_at(root, None)
+        self.first_node = self.node_at(first, None)
+        self.last_node = self.node_at(last, None)
+
+    @staticmethod
+    def file_size(capacity):
+        """
+        returns the size of a node file holding capacity records
+
+        @type capacity: int
+        @param capacity: number of records
+        @rtype: int
+        @returns: the size of the node file in bytes
+        """
+        return DiskAVLTreeList.HEADER.size + DiskAVLTreeList.FREE_BLOCKS.size + capacity * DiskAVLTreeList.RECORD_SIZE
+
+    @staticmethod
+    def index_of_node(node):
+        """
+        returns the record index of node
+
+        @type node: AVLNode or None
+        @param node: a node of the list, a virtual node or None
+        @rtype: int
+        @returns: the record index of node, NIL if node is None or virtual
+        """
+        return DiskAVLTreeList.NIL if node is None or not node.isRealNode() else node.index
+
+    def node_at(self, index, parent):
+        """
+        returns the node stored in record index
+
+        @type index: int
+        @param index: a record index or NIL
+        @type parent: DiskAVLNode or None
+        @param parent: the parent of the virtual node returned for NIL, None for the header fields
+        @rtype: AVLNode or None
+        @returns: the node in record index, a virtual child of parent (or None if parent is None) for NIL
+        """
+        if index != DiskAVLTreeList.NIL:
+            return DiskAVLNode(self, index)
+        if parent is None:
+            return None
+        virtual_node = AVLNode(None, False)
+        virtual_node.setParent(parent)
+        return virtual_node
+
+    def read_field(self, index, field):
+        """
+        returns a field of a record
+
+        @type index: int
+        @param index: a record index
+        @type field: int
+        @param field: offset of the field in the record
+        @rtype: int
+        @returns: the field value
+        """
+        return DiskAVLTreeList.FIELD.unpack_from(self.mm, DiskAVLTreeList.file_size(index) + field)[0]
+
+    def write_field(self, index, field, value):
+        """
+        sets a field of a record
+
+        @type index: int
+        @param index: a record index
+        @type field: int
+        @param field: offset of the field in the record
+        @type value: int
+        @param value: the new field value
+        """
+        DiskAVLTreeList.FIELD.pack_into(self.mm, DiskAVLTreeList.file_size(index) + field, value)
+
+    def write_header(self, field, value):
+        """
+        sets a field of the file header
+
+        @type field: int
+        @param field: offset of the field in the header
+        @type value: int
+        @param value: the new field value
+        """
+        DiskAVLTreeList.FIELD.pack_into(self.mm, field, value)
+
+    def read_value(self, offset):
+        """
+        returns the value stored in the heap file at offset
+
+        @type offset: int
+        @param offset: offset of the value in the heap file, NIL for None
+        @rtype: str or None
+        @returns: the value stored at offset
+        """
+        if offset == DiskAVLTreeList.NIL:
+            return None
+        self.heap_file.seek(offset)
+        length = DiskAVLTreeList.FIELD.unpack(self.heap_file.read(DiskAVLTreeList.FIELD.size))[0]
+        return pickle.loads(self.heap_file.read(length))
+
+    @staticmethod
+    def block_class(length):
+        """
+        returns the class of the heap block holding a value
+
+        @type length: int
+        @param length: the length of the pickled value
+        @rtype: int
+        @returns: the smallest c such that a block of 2 ** c bytes holds the value and its length field
+        """
+        return max(DiskAVLTreeList.MIN_BLOCK_CLASS, (DiskAVLTreeList.FIELD.size + length - 1).bit_length())
+
+    def set_free_block(self, block_class, offset):
+        """
+        sets the first free heap block of a class
+
+        @type block_class: int
+        @param block_class: the class of the block
+        @type offset: int
+        @param offset: offset of the block in the heap file, NIL if no block of the class is free
+        """
+        self.free_blocks[block_class] = offset
+        self.write_header(DiskAVLTreeList.HEADER.size + DiskAVLTreeList.FIELD.size * block_class, offset)
+
+    def write_value(self, value):
+        """
+        stores value in a free heap block of its class, or in a new block at the end of the heap file
+
+        @type value: str or None
+        @param value: the value to be stored
+        @rtype: int
+        @returns: the offset of value in the heap file, NIL for None
+        """
+        if value is None:
+            return DiskAVLTreeList.NIL
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        block_class = DiskAVLTreeList.block_class(len(data))
+        offset = self.free_blocks[block_class]
+        if offset != DiskAVLTreeList.NIL:
+            self.heap_file.seek(offset + DiskAVLTreeList.FIELD.size)
+            self.set_free_block(block_class, DiskAVLTreeList.FIELD.unpack(
+                self.heap_file.read(DiskAVLTreeList.FIELD.size))[0])
+        else:
+            offset = self.heap_end
+            self.heap_end = offset + (1 << block_class)
+            self.write_header(DiskAVLTreeList.HEAP_END, self.heap_end)
+        self.heap_file.seek(offset)
+        self.heap_file.write(DiskAVLTreeList.FIELD.pack(len(data)))
+        self.heap_file.write(data)
+        return offset
+
+    def free_value(self, offset):
+        """
+        puts the heap block at offset on the free list of its class
+
+        @type offset: int
+        @param offset: offset of a value in the heap file, NIL for None
+        """
+        if offset == DiskAVLTreeList.NIL:
+            return
+        self.heap_file.seek(offset)
+        block_class = DiskAVLTreeList.block_class(
+            DiskAVLTreeList.FIELD.unpack(self.heap_file.read(DiskAVLTreeList.FIELD.size))[0])
+        self.heap_file.write(DiskAVLTreeList.FIELD.pack(self.free_blocks[block_class]))
+        self.set_free_block(block_class, offset)
+
+    def grow(self):
+        """
+        doubles the number of records the node file can hold
+        """
+        self.mm.close()
+        self.capacity *= 2
+        self.node_file.truncate(DiskAVLTreeList.file_size(self.capacity))
+        self.mm = mmap.mmap(self.node_file.fileno(), 0)
+        self.write_header(DiskAVLTreeList.CAPACITY, self.capacity)
+
+    def create_node(self, value, is_real=True):
+        """
+        creates a new node, allocating a record for it if it is real
+
+        @type value: str or None
+        @param value: data of the new node
+        @type is_real: bool
+        @param is_real: False if the new node is virtual, True otherwise
+        @rtype: AVLNode
+        @returns: a new node, not linked to any other node
+        """
+        if not is_real:
+            return AVLNode(None, False)
+        if self.free_record != DiskAVLTreeList.NIL:  # reuses the record of a deleted node
+            node = DiskAVLNode(self, self.free_record)
+            self.free_record = self.read_field(node.index, DiskAVLTreeList.LEFT)
+            self.write_header(DiskAVLTreeList.FREE_RECORD, self.free_record)
+        else:
+            if self.count == self.capacity:
+                self.grow()
+            node = DiskAVLNode(self, self.count)
+            self.count += 1
+            self.write_header(DiskAVLTreeList.COUNT, self.count)
+        for field in (DiskAVLTreeList.LEFT, DiskAVLTreeList.RIGHT, DiskAVLTreeList.PARENT, DiskAVLTreeList.VALUE):
+            self.write_field(node.index, field, DiskAVLTreeList.NIL)
+        node.setSize(1)
+        node.setHeight(0)
+        node.setValue(value)
+        return node
+
+    def release_node(self, node):
+        """
+        puts the record of a deleted node on the free list, after freeing the heap block of its value
+
+        @type node: DiskAVLNode
+        @param node: a node which was deleted from self
+        """
+        self.free_value(self.read_field(node.index, DiskAVLTreeList.VALUE))
+        self.write_field(node.index, DiskAVLTreeList.VALUE, DiskAVLTreeList.NIL)
+        self.write_field(node.index, DiskAVLTreeList.LEFT, self.free_record)
+        self.free_record = node.index
+        self.write_header(DiskAVLTreeList.FREE_RECORD, self.free_record)
+
+    def clear(self):
+        """
+        removes all items of the list, and frees all records and heap blocks
+        """
+        AVLTreeList.clear(self)
+        self.count = 0
+        self.write_header(DiskAVLTreeList.COUNT, 0)
+        self.free_record = DiskAVLTreeList.NIL
+        self.write_header(DiskAVLTreeList.FREE_RECORD, DiskAVLTreeList.NIL)
+        for block_class in range(DiskAVLTreeList.BLOCK_CLASSES):
+            self.set_free_block(block_class, DiskAVLTreeList.NIL)
+        self.heap_end = 0
+        self.write_header(DiskAVLTreeList.HEAP_END, 0)
+        self.heap_file.truncate(0)
+
+    def get_node_store(self):
+        """
+        returns the list whose files hold the nodes of self
+
+        @rtype: DiskAVLTreeList
+        @returns: self
+        """
+        return self
+
+    def set_root(self, root):
+        """
+        set root to be the new root of self
+
+        @type root: DiskAVLNode
+        @param root: new root to be set
+        """
+        AVLTreeList.set_root(self, root)
+        self.write_header(DiskAVLTreeList.ROOT, DiskAVLTreeList.index_of_node(root))
+
+    def set_size(self, size):
+        """
+        set size to be the new size of self
+
+        @type size: int
+        @param size: new size of self
+        """
+        AVLTreeList.set_size(self, size)
+        self.write_header(DiskAVLTreeList.SIZE_FIELD, size)
+
+    def set_first_node(self, first_node):
+        """
+        set first_node to be the new first_node of self
+
+        @type first_node: DiskAVLNode
+        @param first_node: new first_node of self
+        """
+        AVLTreeList.set_first_node(self, first_node)
+        self.write_header(DiskAVLTreeList.FIRST, DiskAVLTreeList.index_of_node(first_node))
+
+    def set_last_node(self, last_node):
+        """
+        set last_node to be the new last_node of self
+
+        @type last_node: DiskAVLNode
+        @param last_node: new last_node of self
+        """
+        AVLTreeList.set_last_node(self, last_node)
+        self.write_header(DiskAVLTreeList.LAST, DiskAVLTreeList.index_of_node(last_node))
+
+    def flush(self):
+        """
+        writes all changes of self to disk
+        """
+        self.heap_file.flush()
+        os.fsync(self.heap_file.fileno())
+        self.mm.flush()
+
+    def close(self):
+        """
+        flushes and closes the files of self, self must not be used afterwards
+        """
+        if not self.mm.closed:
+            self.flush()
+            self.mm.close()
+        self.node_file.close()
+        self.heap_file.close()
+
+
+class AVLTreeListView(object):
+    """
+    A class implementing a read-only window over a range of an AVLTreeList, whose indices are translated to the
+    indices of the list. A view is invalidated by any mutation of the list.
+    """
+
+    def __init__(self, tree, start, stop):
+        """
+        Constructor
+
+        @type tree: AVLTreeList
+        @param tree: the viewed list
+        @type start: int
+        @param start: index in tree of the first item of the view
+        @type stop: int
+        @param stop: index in tree after the last item of the view
+        """
+        self.tree = tree
+        self.start = start
+        self.stop = stop
+        self.version = tree.version
+
+    def check_valid(self):
+        """
+        checks that the viewed list was not mutated since the view was created
+
+        @raises RuntimeError: if the view is no longer valid
+        """
+        if self.tree.version != self.version:
+            raise RuntimeError("the AVLTreeList of the view was modified")
+
+    def length(self):
+        """
+        returns the number of items in the view
+
+        @rtype: int
+        @returns: the number of items in the view
+        """
+        self.check_valid()
+        return self.stop - self.start
+
+    def __len__(self):
+        return self.length()
+
+    def retrieve(self, i):
+        """
+        retrieves the value of the i'th item in the view
+
+        @type i: int
+        @param i: index in the view
+        @rtype: str
+        @returns: the value of the i'th item in the view, None if i is out of range
+        """
+        if 0 <= i < self.length():
+            return self.tree.retrieve_node(self.start + i).getValue()
+        return None
+
+    def __getitem__(self, i):
+        """
+        returns the value at index i, supporting negative indices, or a nested view for a slice of step 1
+
+        @type i: int or slice
+        @param i: index or slice in the view
+        @rtype: str or AVLTreeListView
+        @returns: the value of the item, or a view of the slice
+        @raises IndexError: if i is out of range
+        """
+        length = self.length()
+        if isinstance(i, slice):
+            start, stop, step = i.indices(length)
+            if step != 1:
+                raise ValueError("views only support slices with step 1")
+            return self.view(start, max(start, stop))
+        if i < 0:
+            i += length
+        if not 0 <= i < length:
+            raise IndexError("view index out of range")
+        return self.retrieve(i)
+
+    def __iter__(self):
+        """
+        iterates over the values of the view in order, in O(1) amortized time per value
+
+        @raises RuntimeError: if the list is modified during the iteration
+        """
+        remaining = self.length()
+        node = self.tree.retrieve_node(self.start) if remaining > 0 else None
+        while remaining > 0:
+            yield node.getValue()
+            self.check_valid()
+            remaining -= 1
+            node = node.get_successor()
+
+    def view(self, i, j):
+        """
+        returns a view of the items i, i+1, ..., j-1 of self
+
+        @type i: int
+        @type j: int
+        @pre: 0 <= i <= j <= self.length()
+        @param i: index in self of the first item of the view
+        @param j: index in self after the last item of the view
+        @rtype: AVLTreeListView
+        @returns: a view over the same list, which is valid as long as self is
+        @raises IndexError: if the range is not within self
+        """
+        if not 0 <= i <= j <= self.length():
+            raise IndexError("view range out of range")
+        return AVLTreeListView(self.tree, self.start + i, self.start + j)
+
+    def listToArray(self):
+        """
+        returns an array of the values of the view
+
+        @rtype: list
+        @returns: a list of the values of the view
+        """
+        return list(self)
+
+    def materialize(self):
+        """
+        returns an independent list with the items of the view
+
+        @rtype: AVLTreeList
+        @returns: a new AVLTreeList containing the values of the view
+        """
+        return AVLTreeList.make_tree_from_list(self.listToArray(), self.tree.hashed)
+
+
+class FrozenAVLTreeList(object):
+    """
+    A class implementing a read-only list over a shared memory block created by AVLTreeList.freeze_to_shared_memory.
+
+    The block holds the number of items, an array of n + 1 offsets and the pickled values in list order, so the
+    position of an item is its index in the offsets array and values are unpickled straight from the block.
+    """
+    MAGIC = b'AVLFROZN'
+    HEADER = struct.Struct('<8sq')  # magic, number of items
+    OFFSET_SIZE = 8
+    attach_lock = threading.Lock()
+
+    def __init__(self, shm, is_owner):
+        """
+        Constructor, use AVLTreeList.freeze_to_shared_memory or FrozenAVLTreeList.attach instead.
+
+        @type shm: shared_memory.SharedMemory
+        @param shm: the shared memory block
+        @type is_owner: bool
+        @param is_owner: True if self created the block, False otherwise
+        @raises ValueError: if the block was not created by freeze_to_shared_memory
+        """
+        magic, self.size = FrozenAVLTreeList.HEADER.unpack_from(shm.buf, 0)
+        if magic != FrozenAVLTreeList.MAGIC:
+            shm.close()
+            raise ValueError("%s is not a frozen AVLTreeList" % shm.name)
+        self.shm = shm
+        self.is_owner = is_owner
+        data_start = FrozenAVLTreeList.HEADER.size + FrozenAVLTreeList.OFFSET_SIZE * (self.size + 1)
+        self.offsets = shm.buf[FrozenAVLTreeList.HEADER.size:data_start].cast('q')
+        self.data = shm.buf[data_start:]
+
+    @staticmethod
+    def attach(name):
+        """
+        returns a read-only list over the shared memory block name, typically in another process
+
+        @type name: str
+        @param name: the name returned by getName() of the frozen list
+        @rtype: FrozenAVLTreeList
+        @returns: a read-only list over the block, without copying it
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # the creator is the one to unlink it
+        except TypeError:
+            # Python < 3.13 has no track argument and registers the block with the resource tracker, which unlinks
+            # it when this process exits. Unregistering it afterwards would also drop the registration of the
+            # creator when they share a tracker (forked or spawned readers), so registration is skipped instead.
+            with FrozenAVLTreeList.attach_lock:
+                register = resource_tracker.register
+                resource_tracker.register = lambda name, rtype: None
+                try:
+                    shm = shared_memory.SharedMemory(name=name)
+                finally:
+                    resource_tracker.register = register
+        return FrozenAVLTreeList(shm, False)
+
+    def getName(self):
+        """
+        returns the name of the shared memory block
+
+        @rtype: str
+        @returns: the name to pass to FrozenAVLTreeList.attach
+        """
+        return self.shm.name
+
+    def length(self):
+        """
+        returns the size of the list
+
+        @rtype: int
+        @returns: the size of the list
+        """
+        return self.size
+
+    def __len__(self):
+        return self.length()
+
+    def empty(self):
+        """
+        returns whether the list is empty
+
+        @rtype: bool
+        @returns: True if the list is empty, False otherwise
+        """
+        return self.size == 0
+
+    def retrieve(self, i):
+        """
+        retrieves the value of the i'th item in the list
+
+        @type i: int
+        @param i: index in the list
+        @rtype: str
+        @returns: the value of the i'th item in the list, None if i is out of range
+        """
+        if 0 <= i < self.size:
+            return pickle.loads(self.data[self.offsets[i]:self.offsets[i + 1]])
+        return None
+
+    def retrieve_range(self, i, j):
+        """
+        retrieves the values of the items i, i+1, ..., j-1 of the list
+
+        @type i: int
+        @type j: int
+        @param i: index of the first item
+        @param j: index after the last item
+        @rtype: list
+        @returns: the values of the items of the range which are in the list
+        """
+        return [self.retrieve(k) for k in range(max(0, i), min(j, self.size))]
+
+    def first(self):
+        """
+        returns the value of the first item in the list
+
+        @rtype: str
+        @returns: the value of the first item, None if the list is empty
+        """
+        return self.retrieve(0)
+
+    def last(self):
+        """
+        returns the value of the last item in the list
+
+        @rtype: str
+        @returns: the value of the last item, None if the list is empty
+        """
+        return self.retrieve(self.size - 1)
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self.retrieve(i)
+
+    def listToArray(self):
+        """
+        returns an array representing list
+
+        @rtype: list
+        @returns: a list of the values of the list
+        """
+        return list(self)
+
+    def search(self, val):
+        """
+        searches for a *value* in the list
+
+        @type val: str
+        @param val: a value to be searched
+        @rtype: int
+        @returns: the first index that contains val, -1 if not found.
+        """
+        for i in range(self.size):
+            if self.retrieve(i) == val:
+                return i
+        return -1
+
+    def close(self):
+        """
+        detaches self from the shared memory block, self must not be used afterwards
+        """
+        self.offsets.release()
+        self.data.release()
+        self.shm.close()
+
+    def unlink(self):
+        """
+        detaches self from the shared memory block and frees it, once every process has closed it
+
+        @pre: self was returned by freeze_to_shared_memory
+        """
+        self.close()
+        if self.is_owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:  # already unlinked by another process
+                if os.name == 'posix':
+                    resource_tracker.unregister(self.shm._name, "shared_memory")
+
+
+class Journal(object):
+    """
+    A class implementing a write-ahead log for the mutations of an AVLTreeList.
+
+    Records are appended to path + '.log', handed to the OS right away, and fsynced in groups: once batch_size
+    records are pending, or by a background timer once flush_interval seconds have passed since the first
+    pending record, even if the list goes idle. Every checkpoint_every records, the whole list is written to
+    path + '.ckpt' and the log is truncated.
+    """
+    INSERT, DELETE, CONCAT, REPLACE, CLEAR = 0, 1, 2, 3, 4
+    RECORD_HEADER = struct.Struct('<II')  # payload length, payload crc32
+
+    def __init__(self, path, batch_size=1, flush_interval=None, checkpoint_every=None):
+        """
+        Constructor, opens (or creates) the journal files of path.
+
+        @type path: str
+        @param path: the prefix of the log and checkpoint files
+        @type batch_size: int
+        @param batch_size: number of records that are fsynced together, 1 to fsync every record
+        @type flush_interval: float or None
+        @param flush_interval: maximal number of seconds a pending record waits for the rest of its batch before
+                               it is fsynced, None to wait for a full batch (or a sync() or close())
+        @type checkpoint_every: int or None
+        @param checkpoint_every: number of records between automatic checkpoints, None to disable them
+        """
+        self.log_path = path + '.log'
+        self.checkpoint_path = path + '.ckpt'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkpoint_every = checkpoint_every
+        self.log_file = open(self.log_path, 'ab')
+        self.seq = 0
+        self.pending = 0
+        self.records_since_checkpoint = 0
+        self.lock = threading.RLock()  # the flush timer syncs from its own thread
+        self.flush_timer = None
+
+    def append(self, op, args):
+        """
+        appends a mutation record to the log, and fsyncs the log if the group commit is due
+
+        @type op: int
+        @param op: the mutation, one of Journal.INSERT, Journal.DELETE, Journal.CONCAT, Journal.REPLACE and
+                   Journal.CLEAR
+        @type args: tuple
+        @param args: the arguments of the mutation
+        """
+        with self.lock:
+            self.seq += 1
+            payload = pickle.dumps((self.seq, op, args), pickle.HIGHEST_PROTOCOL)
+            self.log_file.write(Journal.RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+            self.log_file.write(payload)
+            self.log_file.flush()  # survives a crash of the process from here on, and of the machine once fsynced
+            self.pending += 1
+            self.records_since_checkpoint += 1
+            if self.pending >= self.batch_size or self.flush_interval == 0:
+                self.sync()
+            elif self.flush_interval is not None and self.flush_timer is None:
+                self.flush_timer = threading.Timer(self.flush_interval, self.sync)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+
+    def sync(self):
+        """
+        makes all appended records durable
+        """
+        with self.lock:
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            if self.log_file.closed:  # a timer which fired while the journal was being closed
+                return
+            self.log_file.flush()
+            os.fsync(self.log_file.fileno())
+            self.pending = 0
+
+    def needs_checkpoint(self):
+        """
+        returns whether an automatic checkpoint is due
+
+        @rtype: bool
+        @returns: True if checkpoint_every records were appended since the last checkpoint, False otherwise
+        """
+        return self.checkpoint_every is not None and self.records_since_checkpoint >= self.checkpoint_every
+
+    def checkpoint(self, values):
+        """
+        atomically replaces the checkpoint with values and truncates the log
+
+        @type values: list
+        @param values: the values of the list, as returned by listToArray
+        """
+        tmp_path = self.checkpoint_path + '.tmp'
+        with self.lock:
+            with open(tmp_path, 'wb') as checkpoint_file:
+                pickle.dump((self.seq, values), checkpoint_file, pickle.HIGHEST_PROTOCOL)
+                checkpoint_file.flush()
+                os.fsync(checkpoint_file.fileno())
+            os.replace(tmp_path, self.checkpoint_path)
+            Journal.fsync_directory(self.checkpoint_path)  # makes the rename itself durable
+            self.log_file.truncate(0)  # records up to self.seq are skipped on recovery if this is lost
+            self.sync()
+            self.records_since_checkpoint = 0
+
+    @staticmethod
+    def fsync_directory(path):
+        """
+        makes the directory entries of the directory containing path durable
+
+        @type path: str
+        @param path: a file path
+        """
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def recover(self):
+        """
+        reads back the latest checkpoint and the valid log records after it, dropping a torn tail of the log
+
+        @rtype: tuple
+        @returns: the checkpointed values and a list of (op, args) records to replay on them
+        """
+        self.seq = 0
+        values = []
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'rb') as checkpoint_file:
+                self.seq, values = pickle.load(checkpoint_file)
+        with open(self.log_path, 'rb') as log_file:
+            data = log_file.read()
+        records = []
+        offset = 0
+        while offset + Journal.RECORD_HEADER.size <= len(data):
+            length, crc = Journal.RECORD_HEADER.unpack_from(data, offset)
+            payload = data[offset + Journal.RECORD_HEADER.size:offset + Journal.RECORD_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            seq, op, args = pickle.loads(payload)
+            if seq > self.seq:
+                records.append((op, args))
+                self.seq = seq
+            offset += Journal.RECORD_HEADER.size + length
+        if offset < len(data):
+            self.log_file.truncate(offset)
+            self.sync()
+        self.records_since_checkpoint = len(records)
+        return values, records
+
+    def close(self):
+        """
+        makes all appended records durable and closes the log
+        """
+        with self.lock:
+            self.sync()
+            self.log_file.close()
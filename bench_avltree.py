@@ -0,0 +1,190 @@
+"""
+Benchmarks for AVLTreeList, reproducing the tables quoted in the commit messages:
+
+    python bench_avltree.py > bench_output.txt
+    python bench_avltree.py --quick  # 10 times smaller, for a smoke run
+
+Sections: balancing policies under uniform, Zipfian and sequential traces, journal group commit, compaction and
+retrieve_many. Times are the best of several runs, so they can be compared within one run of the script.
+"""
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from avltree_impl import AVLBalancingPolicy, AVLTreeList, Journal, SplayBalancingPolicy
+
+
+class CountingPolicy(object):
+    """
+    A balancing policy wrapper counting the rotations done on accesses
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.rotations = 0
+
+    def rebalance(self, tree, starting_node, fix_to_the_root):
+        return self.policy.rebalance(tree, starting_node, fix_to_the_root)
+
+    def access(self, tree, node):
+        rotations_count = self.policy.access(tree, node)
+        self.rotations += rotations_count
+        return rotations_count
+
+
+def best_time(function, repeat):
+    """
+    returns the best wall time of function over repeat runs
+
+    @type function: callable
+    @param function: the code to time, called without arguments
+    @type repeat: int
+    @param repeat: number of runs
+    @rtype: float
+    @returns: the best time in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def tree_height(tree):
+    """
+    returns the height of the tree of a list
+
+    @type tree: AVLTreeList
+    @param tree: a list
+    @rtype: int
+    @returns: the height of the root, -1 if the list is empty
+    """
+    return -1 if tree.empty() else tree.getRoot().getHeight()
+
+
+def traces(n, count, rng):
+    """
+    returns the access traces of the policy benchmark
+
+    @type n: int
+    @param n: the length of the list
+    @type count: int
+    @param count: the number of accesses of each trace
+    @type rng: random.Random
+    @param rng: the random generator
+    @rtype: list
+    @returns: (name, indices) pairs
+    """
+    hot_order = list(range(n))
+    rng.shuffle(hot_order)  # the hot items are spread over the list
+    zipf_weights = list(itertools.accumulate(1.0 / rank ** 1.1 for rank in range(1, n + 1)))
+    return [('uniform', [rng.randrange(n) for _ in range(count)]),
+            ('zipf (s=1.1)', rng.choices(hot_order, cum_weights=zipf_weights, k=count)),
+            ('sequential', [k % n for k in range(count)])]
+
+
+def bench_policies(scale, rng):
+    """
+    prints the retrieve latency and rotations per retrieve of every balancing policy under every trace
+    """
+    n, count = 50000 // scale, 100000 // scale
+    print("Balancing policies: %d retrieves on a %d-item list" % (count, n))
+    print("  %-6s %-13s %12s %19s" % ('policy', 'trace', 'us/retrieve', 'rotations/retrieve'))
+    for trace_name, indices in traces(n, count, rng):
+        for policy_name, policy_class in (('avl', AVLBalancingPolicy), ('splay', SplayBalancingPolicy)):
+            policy = CountingPolicy(policy_class())
+            tree = AVLTreeList(policy)
+            for value in range(n):
+                tree.insert(value, value)
+            policy.rotations = 0
+            elapsed = best_time(lambda: [tree.retrieve(i) for i in indices], 1)
+            print("  %-6s %-13s %12.1f %19.1f" % (policy_name, trace_name, elapsed / count * 1e6,
+                                                  policy.rotations / count))
+    print()
+
+
+def bench_journal(scale):
+    """
+    prints the insert throughput without a journal and with journals of several group commit settings
+    """
+    count = 5000 // scale
+    print("Journal: %d inserts" % count)
+    print("  %-22s %10s" % ('setting', 'ops/s'))
+    directory = tempfile.mkdtemp()
+    try:
+        settings = [('no journal', None), ('batch_size=1', {}), ('batch_size=16', {'batch_size': 16}),
+                    ('batch_size=256', {'batch_size': 256}),
+                    ('flush_interval=10ms', {'batch_size': 1 << 30, 'flush_interval': 0.01})]
+        for k, (name, kwargs) in enumerate(settings):
+            tree = AVLTreeList()
+            if kwargs is not None:
+                tree.set_journal(Journal(os.path.join(directory, str(k)), **kwargs))
+            start = time.perf_counter()
+            for value in range(count):
+                tree.insert(value, value)
+            if tree.get_journal() is not None:
+                tree.get_journal().close()
+            print("  %-22s %10.0f" % (name, count / (time.perf_counter() - start)))
+    finally:
+        shutil.rmtree(directory)
+    print()
+
+
+def bench_compaction(scale, rng):
+    """
+    prints the height and retrieve latency of a list after random churn, before and after compact()
+    """
+    operations, count = 150000 // scale, 200000 // scale
+    tree = AVLTreeList()
+    for step in range(operations):
+        if tree.empty() or rng.random() < 0.6:
+            tree.insert(rng.randint(0, tree.length()), step)
+        else:
+            tree.delete(rng.randrange(tree.length()))
+    indices = [rng.randrange(tree.length()) for _ in range(count)]
+    print("Compaction: %d random inserts and deletes (%d items), %d random retrieves" % (operations, tree.length(),
+                                                                                      count))
+    print("  %-8s %6s %12s" % ('', 'height', 'us/retrieve'))
+    elapsed = best_time(lambda: [tree.retrieve(i) for i in indices], 5)
+    print("  %-8s %6d %12.2f" % ('before', tree_height(tree), elapsed / count * 1e6))
+    compact_time = best_time(tree.compact, 1)
+    elapsed = best_time(lambda: [tree.retrieve(i) for i in indices], 5)
+    print("  %-8s %6d %12.2f" % ('after', tree_height(tree), elapsed / count * 1e6))
+    print("  compact() took %.1f ms" % (compact_time * 1e3))
+    print()
+
+
+def bench_retrieve_many(scale, rng):
+    """
+    prints the time of retrieve_many against a loop of retrieve, for several batch sizes
+    """
+    n = 200000 // scale
+    tree = AVLTreeList.make_tree_from_list(list(range(n)))
+    print("retrieve_many: random indices in a %d-item list" % n)
+    print("  %-8s %18s %18s" % ('k', 'loop of retrieve', 'retrieve_many'))
+    for k in (100, 1000, 10000, 100000):
+        if k > n:
+            break
+        indices = [rng.randrange(n) for _ in range(k)]
+        loop_time = best_time(lambda: [tree.retrieve(i) for i in indices], 5)
+        many_time = best_time(lambda: tree.retrieve_many(indices), 5)
+        print("  %-8d %15.1f ms %15.1f ms" % (k, loop_time * 1e3, many_time * 1e3))
+    print()
+
+
+def main(argv):
+    scale = 10 if '--quick' in argv else 1
+    rng = random.Random(0)
+    bench_policies(scale, rng)
+    bench_journal(scale)
+    bench_compaction(scale, rng)
+    bench_retrieve_many(scale, rng)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])